@@ -1,7 +1,13 @@
 #!/usr/bin/env python3
 
+import functools
+import itertools
 import logging
+import os
+import re
+import sys
 
+from collections import Counter
 from typing import List, Optional
 
 from synthaser import settings
@@ -9,8 +15,10 @@ from synthaser.models import Serialiser, Domain
 
 LOG = logging.getLogger(__name__)
 
+EVALUATOR_INDEX = re.compile(r"\b(\d+)\b")
 
-def traverse_graph(graph, rules, domains, classifiers=None):
+
+def traverse_graph(graph, rules, domains, classifiers=None, _cache=None):
     """Traverses a rule graph and classifies a collection of domains.
 
     Each node is a dictionary with the schema:
@@ -32,25 +40,41 @@ def traverse_graph(graph, rules, domains, classifiers=None):
     Finally a classification list, containing the path of rules satisfied
     by the given domains, is returned.
 
+    Rules requiring domain types not present in the domains are skipped
+    without being evaluated. Other rule evaluations are memoised in _cache,
+    keyed on the rule name, which only saves work in graphs where a rule
+    appears more than once. Domains are only renamed once the path of
+    satisfied rules is complete, so results stay valid for the traversal.
+
     Args:
         graph (list, dict): Rule graph to traverse.
         rules (dict): Rule objects to evaluate on domains.
         domains (list): Domain objects to classify.
         classifiers (list): Current classifiers for a Domain collection.
+        _cache (dict): Rule evaluations; only valid for one Domain collection.
     Returns:
         classifiers
     """
     if not classifiers:
         classifiers = []
+    if _cache is None:
+        _cache = {}
+    present = {domain.type for domain in domains}
     for node in graph:
         title = node["title"]
         rule = rules[title]
-        if not rule.satisfied_by(domains):
+        if not rule.required_types <= present:
+            continue
+        if title not in _cache:
+            _cache[title] = rule.satisfied_by(domains)
+        if not _cache[title]:
             continue
         classifiers.append(title)
         children = node.get("children")
         if children:
-            classifiers = traverse_graph(children, rules, domains, classifiers)
+            classifiers = traverse_graph(
+                children, rules, domains, classifiers, _cache
+            )
         rule.rename_domains(domains)
         return classifiers
     return classifiers
@@ -115,7 +139,7 @@ class RuleGraph(Serialiser):
         }
 
     def classify(self, domains):
-        return traverse_graph(self.graph, self.rules, domains)
+        return traverse_graph(self.graph, self.rules, domains, _cache={})
 
 
 class Rule:
@@ -145,6 +169,90 @@ class Rule:
         self.filters = filters if filters else []
         self.evaluator = evaluator if evaluator else ""
 
+    @property
+    def required_types(self):
+        """Domain types required by this rule; see get_required_types.
+
+        This is cached, and reset whenever the order, domains or evaluator of
+        the rule are set.
+        """
+        if self._required_types is None:
+            self._required_types = self.get_required_types()
+        return self._required_types
+
+    @property
+    def order(self):
+        return self._order
+
+    @order.setter
+    def order(self, order):
+        self._order = order
+        self._required_types = None
+
+    @property
+    def domains(self):
+        return self._domains
+
+    @domains.setter
+    def domains(self, domains):
+        """Sets the domain types required by this rule.
+
+        Each domain type is also stored with the number of times it occurs
+        earlier in the list, e.g. ["KS", "AT", "KS"] --> [("KS", 0), ("AT", 0),
+        ("KS", 1)], for matching counts of domains in satisfied_by.
+        """
+        self._domains = [sys.intern(domain) for domain in domains]
+        seen = Counter()
+        self._slots = []
+        for domain in self._domains:
+            self._slots.append((domain, seen[domain]))
+            seen[domain] += 1
+        self._required_types = None
+
+    @property
+    def evaluator(self):
+        return self._evaluator
+
+    @evaluator.setter
+    def evaluator(self, evaluator):
+        """Sets the evaluator string and compiles it to a callable.
+
+        Each index in the evaluator is rewritten to a lookup in the conditions
+        list, e.g. "0 and (1 or 2)" --> "lambda c: (c[0] and (c[1] or c[2]))".
+        The resulting lambda is compiled once here, rather than every time the
+        rule is evaluated. An empty evaluator requires every condition be met.
+        """
+        # Tokenise once; split() places each captured index at the odd positions
+        chunks = EVALUATOR_INDEX.split(evaluator)
+        self._evaluator = evaluator
+        self._placeholders = [int(index) for index in chunks[1::2]]
+        self._required_types = None
+        if not evaluator:
+            self._evaluate = all
+            return
+        rewritten = "".join(
+            f"c[{chunk}]" if i % 2 else chunk for i, chunk in enumerate(chunks)
+        )
+        code = compile(f"lambda c: ({rewritten})", "<rule>", "eval")
+        self._evaluate = eval(code, {"__builtins__": {}})
+
+    @property
+    def filters(self):
+        return self._filters
+
+    @filters.setter
+    def filters(self, filters):
+        """Sets the filters list and indexes the CDD families of each domain type.
+
+        Only the first filter given for a domain type is used.
+        """
+        self._filters = filters
+        self._families = {}
+        for filt in filters:
+            self._families.setdefault(
+                sys.intern(filt["type"]), frozenset(filt["domains"])
+            )
+
     def to_dict(self):
         return {
             "name": self.name,
@@ -158,18 +266,38 @@ class Rule:
     def evaluate(self, conditions):
         """Evaluates the rules evaluator string given evaluated conditions.
 
-        Iterates backwards to avoid bad substitutions in larger (>=10) indices.
-        e.g. "0 and 1 and ... and 13" --> "False and True and ... and True3"
-
         Arguments:
             conditions (list): Boolean values corresponding to domains in this rule.
         Returns:
             True if rule is satisfied, otherwise False.
         """
-        evaluator = self.evaluator
-        for idx, condition in reversed(list(enumerate(conditions))):
-            evaluator = evaluator.replace(str(idx), str(condition))
-        return eval(evaluator)
+        return bool(self._evaluate(conditions))
+
+    def get_required_types(self, max_conditions=12):
+        """Finds domain types that must be present for this rule to be satisfied.
+
+        A domain type is required if the evaluator is False for every combination
+        of conditions in which no domain of that type has matched. Combinations are
+        only enumerated for rules with up to max_conditions domains; above this,
+        only domain types given individually in the order are considered.
+
+        Returns:
+            frozenset: Required domain types.
+        """
+        required = {domain for domain in self.order if isinstance(domain, str)}
+        total = max([len(self.domains), *(i + 1 for i in self._placeholders)])
+        if total > max_conditions:
+            return frozenset(required)
+        satisfying = [
+            conditions
+            for conditions in itertools.product((False, True), repeat=total)
+            if self.evaluate(conditions)
+        ]
+        for domain_type in set(self.domains):
+            indices = [i for i, d in enumerate(self.domains) if d == domain_type]
+            if all(any(c[i] for i in indices) for c in satisfying):
+                required.add(domain_type)
+        return frozenset(required)
 
     def rename_domains(self, domains):
         """Renames domain types if substitutions are specified in the rule.
@@ -183,20 +311,35 @@ class Rule:
         example, in a PKS-NRPS, the PP-binding domain in the NRPS module should
         be named T, not ACP. So, its rule is {'after': ['A', 'C'], 'to': 'T'};
         any ACP domains after the first A or C will be renamed T.
+
+        Returns:
+            True if any domain types were changed, otherwise False.
         """
+        changed = False
         if not self.renames:
-            return
+            return changed
+        types = {domain.type for domain in domains}
         for rename in self.renames:
+            source, target = rename["from"], rename["to"]
+            # Nothing to rename, so skip scanning the domains
+            if source == target or source not in types:
+                continue
             befores = rename.get("before", [])
             afters = rename.get("after", [])
+            # Domains only renamed after one of these, which are not present
+            if afters and types.isdisjoint(afters):
+                continue
             flag = not afters  # Start True if no after domains specified
             for domain in domains:
                 if not flag and domain.type in afters:
                     flag = True
                 elif flag and domain.type in befores:
                     flag = False
-                elif flag and domain.type == rename["from"]:
-                    domain.type = rename["to"]
+                elif flag and domain.type == source:
+                    domain.type = sys.intern(target)
+                    types.add(target)
+                    changed = True
+        return changed
 
     def valid_family(self, domain):
         """Checks a given domain matches a specified CDD family in the rule.
@@ -214,10 +357,8 @@ class Rule:
                 "domains": ["one", "two"]
             ]
         """
-        for filt in self.filters:
-            if filt["type"] == domain.type:
-                return domain.accession in filt["domains"]
-        return True
+        families = self._families.get(domain.type)
+        return families is None or domain.accession in families
 
     def valid_order(self, domains: List[Domain]) -> bool:
         """Checks given domains match specified order, if any.
@@ -252,27 +393,40 @@ class Rule:
         1) required domain types are represented in the supplied domains, and
         2) domains are of the desired CDD families, if any are specified.
 
-        Placeholders in the evaluator string are then replaced by their
-        respective booleans, and evaluated.
+        The evaluator is then called with the respective boolean of each
+        domain in the rule.
 
         Once a domain in the supplied domains has matched one in the rule, it
         cannot be matched to another in the rule. This enables rules based on
-        counts of domains (e.g. multi-modular PKS w/ 2 KS domains).
+        counts of domains (e.g. multi-modular PKS w/ 2 KS domains). Since family
+        filters depend only on domain type, the nth domain of a type in the rule
+        is matched when more than n domains of that type pass the filters.
         """
-        LOG.debug("Evaluating %s against %s", self.name, [d.type for d in domains])
-        seen = []
-        conditions = []
-        for rule_domain in self.domains:
-            match = False
-            for domain in domains:
-                if domain in seen:
-                    continue
-                if domain.type == rule_domain and self.valid_family(domain):
-                    seen.append(domain)
-                    match = True
-                    break
-            conditions.append(match)
-        return self.evaluate(conditions) and self.valid_order(domains)
+        if LOG.isEnabledFor(logging.DEBUG):
+            LOG.debug("Evaluating %s against %s", self.name, [d.type for d in domains])
+        counts = Counter(
+            domain.type for domain in domains if self.valid_family(domain)
+        )
+        conditions = [counts[domain] > rank for domain, rank in self._slots]
+        return self._evaluate(conditions) and self.valid_order(domains)
+
+
+@functools.lru_cache(maxsize=8)
+def load_rulegraph(rule_file, mtime):
+    """Loads a RuleGraph from a rule file.
+
+    Loaded RuleGraphs are cached per process. The modification time of the rule
+    file is part of the cache key, so edited rule files are reloaded.
+
+    Arguments:
+        rule_file (str): Path to classification rule file.
+        mtime (float): Modification time of the rule file.
+    Returns:
+        RuleGraph: Classification rules loaded from the file.
+    """
+    with open(rule_file) as fp:
+        LOG.info("Loading rules: %s", fp.name)
+        return RuleGraph.from_json(fp)
 
 
 def classify(synthases, rule_file=None):
@@ -286,8 +440,6 @@ def classify(synthases, rule_file=None):
         rule_file (str): Path to custom classification rule file.
     """
     rule_file = rule_file or settings.RULE_FILE
-    with open(rule_file) as fp:
-        LOG.info("Loading rules: %s", fp.name)
-        rg = RuleGraph.from_json(fp)
+    rg = load_rulegraph(rule_file, os.path.getmtime(rule_file))
     for synthase in synthases:
         synthase.classification = rg.classify(synthase.domains)
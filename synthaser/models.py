@@ -1,13 +1,21 @@
 import json
 import logging
+import sys
 
 from collections import defaultdict, UserList
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 
 LOG = logging.getLogger(__name__)
 
 
 class Serialiser:
+    __slots__ = ()
+
     def to_dict(self):
         raise NotImplementedError
 
@@ -23,10 +31,18 @@ class Serialiser:
 
     @classmethod
     def from_json(cls, js, **kwargs):
-        if isinstance(js, str):
-            d = json.loads(js, **kwargs)
+        if not isinstance(js, str):
+            js = js.read()
+        # orjson, if installed, is only used for faster parsing; output is always
+        # written by json so files are the same regardless of what is installed.
+        # Fall back to json for kwargs, and input orjson rejects (e.g. NaN)
+        if orjson and not kwargs:
+            try:
+                d = orjson.loads(js)
+            except orjson.JSONDecodeError:
+                d = json.loads(js)
         else:
-            d = json.load(js, **kwargs)
+            d = json.loads(js, **kwargs)
         return cls.from_dict(d)
 
 
@@ -88,18 +104,23 @@ class Synthase(Serialiser):
         output = defaultdict(lambda: defaultdict(list))
 
         for domain in self.domains:
+            in_types = types and domain.type in types
+            in_families = families and (
+                domain.domain in families
+                or domain.accession in families
+            )
+            if not (in_types or in_families):
+                continue
+
             # Slice from parent sequence
             sequence = domain.slice(self.sequence)
 
             # Domain types
-            if types and domain.type in types:
+            if in_types:
                 output["types"][domain.type].append(sequence)
 
             # Specific domain families
-            if families and (
-                domain.domain in families
-                or domain.accession in families
-            ):
+            if in_families:
                 output["families"][domain.domain].append(sequence)
 
         return output
@@ -195,6 +216,20 @@ class Domain(Serialiser):
         superfamily (str): CDD accession of domain superfamily
     """
 
+    # Fixed attribute layout; Domain objects are created for every CD-Search hit
+    # and their fields are read repeatedly when filtering and classifying
+    __slots__ = (
+        "pssm",
+        "type",
+        "domain",
+        "start",
+        "end",
+        "evalue",
+        "bitscore",
+        "accession",
+        "superfamily",
+    )
+
     def __init__(
         self,
         pssm=None,
@@ -208,7 +243,8 @@ class Domain(Serialiser):
         superfamily=None,
     ):
         self.pssm = pssm
-        self.type = type
+        # Interned so type comparisons and lookups can short-circuit on identity
+        self.type = sys.intern(type) if isinstance(type, str) else type
         self.domain = domain
         self.start = start
         self.end = end
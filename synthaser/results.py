@@ -251,11 +251,9 @@ def filter_domains(domains, by="evalue", coverage_pct=0.5, tolerance_pct=0.1):
         for group in group_overlapping_hits(domains)
     ]
 
-    i, total = 1, len(domains)
-    while i < total:
-        if i + 1 == total:
-            break
-        previous, current = domains[i - 1 : i + 1]
+    merged = domains[:1]
+    for current in domains[1:]:
+        previous = merged[-1]
 
         # When domains are likely together, e.g. two small C domain hits right next
         # to each other or multiple Methyltransf_X domains, extend its border
@@ -263,10 +261,9 @@ def filter_domains(domains, by="evalue", coverage_pct=0.5, tolerance_pct=0.1):
             previous, current, coverage_pct, tolerance_pct
         ):
             previous.end = current.end
-            del domains[i]
-            continue
-        i += 1
-    return domains
+        else:
+            merged.append(current)
+    return merged
 
 
 def choose_representative_domain(group, by="evalue"):
@@ -294,17 +291,18 @@ def choose_representative_domain(group, by="evalue"):
             (e.g. Condensation -> Epimerization).
     """
     key_functions = {
-        "bitscore": (lambda d: d.bitscore / DOMAINS[d.accession]["bitscore"], True),
-        "evalue": (lambda d: d.evalue, False),
-        "length": (lambda d: d.end - d.start, True),
+        "bitscore": (lambda d: d.bitscore / DOMAINS[d.accession]["bitscore"], max),
+        "evalue": (lambda d: d.evalue, min),
+        "length": (lambda d: d.end - d.start, max),
     }
 
     if by not in key_functions:
         raise ValueError("Expected 'bitscore', 'evalue' or 'length'")
 
-    key, reverse = key_functions[by]
+    key, best = key_functions[by]
 
-    return sorted(group, key=key, reverse=reverse)[0]
+    # Single pass; like a stable sort, ties resolve to the earliest domain
+    return best(group, key=key)
 
 
 def group_overlapping_hits(domains):
@@ -315,27 +313,27 @@ def group_overlapping_hits(domains):
     Yields:
         group (list): Group of overlapping Domain objects
     """
-    sorted_domains = sorted(domains, key=attrgetter("start"))
-
-    if not sorted_domains:
-        return
+    sorted_domains = iter(sorted(domains, key=attrgetter("start")))
 
     # Initialise first group and initial upper bound
-    first = sorted_domains.pop(0)
-    group, border = [first], first.end
+    # Use 10bp to account for slight domain overlap between distinct groups,
+    # folded into the bound so each domain needs only a single comparison
+    first = next(sorted_domains, None)
+    if first is None:
+        return
+    group, border = [first], first.end - 10
 
     for domain in sorted_domains:
 
         # New domain overlaps current run, so save and set new upper bound
-        # Use 10bp to account for slight domain overlap between distinct groups
-        if domain.start + 10 <= border:
+        if domain.start <= border:
             group.append(domain)
-            border = max(border, domain.end)
+            border = max(border, domain.end - 10)
 
         # Current run is over; yield and reset
         else:
             yield group
-            group, border = [domain], domain.end
+            group, border = [domain], domain.end - 10
 
     # End the final run
     yield group
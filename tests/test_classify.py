@@ -4,3 +4,144 @@
 """
 Tests for classify.py
 """
+
+import os
+
+import pytest
+
+from synthaser.classify import Rule, RuleGraph, load_rulegraph, traverse_graph
+from synthaser.models import Domain
+
+
+@pytest.mark.parametrize(
+    "evaluator,conditions,expected",
+    [
+        ("0 and (1 or 2)", [True, False, True], True),
+        ("0 and (1 or 2)", [True, False, False], False),
+        ("(0 or 1) and 2 and not 3", [False, True, True, True], False),
+        ("0 and 11", [True] + [False] * 10 + [True], True),
+        ("1 and 10", [False] * 10 + [True], False),
+        ("", [True, True], True),
+        ("", [True, False], False),
+    ],
+)
+def test_Rule_evaluate(evaluator, conditions, expected):
+    rule = Rule(evaluator=evaluator)
+    assert rule.evaluate(conditions) is expected
+
+
+def test_Rule_evaluator_recompiled():
+    rule = Rule(evaluator="0")
+    assert rule.evaluate([True, False])
+    rule.evaluator = "1"
+    assert not rule.evaluate([True, False])
+    assert rule.to_dict()["evaluator"] == "1"
+
+
+def test_RuleGraph_classify_memoises_rules(monkeypatch):
+    rg = RuleGraph(
+        rules={
+            "A": Rule(name="A", domains=["KS"], evaluator="not 0"),
+            "KS": Rule(name="KS", domains=["KS"], evaluator="0"),
+        },
+        graph=[
+            {"title": "A", "children": []},
+            {"title": "KS", "children": [{"title": "A", "children": []}]},
+        ],
+    )
+    rule = rg.rules["A"]
+    calls = []
+
+    def counted_satisfied_by(domains):
+        calls.append(domains)
+        return Rule.satisfied_by(rule, domains)
+
+    monkeypatch.setattr(rule, "satisfied_by", counted_satisfied_by)
+    domains = [Domain(type="KS", domain="PKS_KS", start=1, end=100)]
+    assert rg.classify(domains) == ["KS"]
+    assert len(calls) == 1
+
+
+def test_Rule_required_types():
+    rule = Rule(
+        domains=["AT", "SAT", "ER", "DH", "KS"],
+        order=["ER", ["AT", "SAT"]],
+        evaluator="(0 or 1) and 3 and not 4",
+    )
+    assert rule.required_types == {"DH", "ER"}
+
+
+def test_RuleGraph_classify_skips_missing_types(monkeypatch):
+    rg = RuleGraph(
+        rules={"A": Rule(name="A", domains=["A", "C"], evaluator="0 and 1")},
+        graph=[{"title": "A", "children": []}],
+    )
+
+    def not_evaluated(domains):
+        raise AssertionError("Pruned rule should not be evaluated")
+
+    monkeypatch.setattr(rg.rules["A"], "satisfied_by", not_evaluated)
+    domains = [Domain(type="A", domain="A_NRPS", start=1, end=100)]
+    assert rg.classify(domains) == []
+
+
+def test_Rule_satisfied_by_filters():
+    rule = Rule(
+        domains=["KS", "KS"],
+        filters=[{"type": "KS", "domains": ["smart00825"]}],
+        evaluator="0 and 1",
+    )
+    domains = [
+        Domain(type="KS", accession="smart00825", start=1, end=100),
+        Domain(type="AT", accession="cd00833", start=200, end=300),
+        Domain(type="KS", accession="cd00833", start=400, end=500),
+    ]
+    assert not rule.satisfied_by(domains)
+    domains[2].accession = "smart00825"
+    assert rule.satisfied_by(domains)
+    assert rule.valid_family(domains[1])
+
+
+def test_load_rulegraph_cached(tmp_path):
+    rule_file = tmp_path / "rules.json"
+    rule_file.write_text('{"rules": [], "hierarchy": []}')
+    mtime = os.path.getmtime(rule_file)
+    rg = load_rulegraph(str(rule_file), mtime)
+    assert load_rulegraph(str(rule_file), mtime) is rg
+    assert load_rulegraph(str(rule_file), mtime + 1) is not rg
+
+
+def test_Rule_rename_domains():
+    rule = Rule(
+        renames=[
+            {"from": "TR", "to": "TR", "after": ["KS"], "before": []},
+            {"from": "ACP", "to": "T", "after": ["A", "C"], "before": []},
+            {"from": "T", "to": "ACP", "after": ["KS"], "before": ["A", "C"]},
+        ]
+    )
+    domains = [
+        Domain(type="KS"),
+        Domain(type="ACP"),
+        Domain(type="C"),
+        Domain(type="A"),
+        Domain(type="ACP"),
+    ]
+    assert rule.rename_domains(domains)
+    assert [d.type for d in domains] == ["KS", "ACP", "C", "A", "T"]
+    assert not rule.rename_domains(domains)
+
+
+def test_Rule_required_types_reset():
+    rule = Rule(name="x", domains=["KS"], evaluator="0")
+    graph = [{"title": "x"}]
+    assert rule.required_types == {"KS"}
+    assert traverse_graph(graph, {"x": rule}, []) == []
+
+    rule.evaluator = "not 0"
+    assert rule.required_types == set()
+    assert traverse_graph(graph, {"x": rule}, []) == ["x"]
+
+    rule.domains = ["A", "C"]
+    rule.evaluator = "0 and 1"
+    rule.order = ["C", "KS"]
+    assert rule.required_types == {"A", "C", "KS"}
@@ -4,8 +4,12 @@
 Test suite for models.py
 """
 
+import json
+import math
+
 import pytest
 
+from synthaser import models
 from synthaser.models import SynthaseContainer, Synthase, Domain
 
 
@@ -82,6 +86,11 @@ def test_domain_eq(domains):
     with pytest.raises(TypeError):
         domains[0] == 1
 
+    renamed = Domain(start=1, end=90, type="ACP", domain="PKS_KS")
+    assert renamed != domains[0]
+    renamed.type = "KS"
+    assert renamed == domains[0]
+
 
 def test_synthase_str(synthase):
     assert str(synthase) == "test\tKS-AT"
@@ -155,6 +164,10 @@ def test_Synthase_extract_domains(synthase, domains):
         "KS": ["A" * 10 + "B" * 70 + "C" * 10, "A" + "B" * 70],
         "AT": ["D" * 101]
     }
+    assert synthase.extract_domains(types=["AT"], families=["PKS"]) == {
+        "types": {"AT": ["D" * 101]},
+        "families": {"PKS": ["A" + "B" * 70]},
+    }
     with pytest.raises(ValueError):
         synthase.sequence = ""
         synthase.extract_domains()
@@ -255,3 +268,36 @@ def test_SynthaseContainer_json_serialisation(sc, tmp_path):
         sc2 = SynthaseContainer.from_json(fp)
 
     assert sc == sc2
+
+
+@pytest.fixture(params=["orjson", "json"])
+def json_backend(request, monkeypatch):
+    if request.param == "orjson":
+        pytest.importorskip("orjson")
+    else:
+        monkeypatch.setattr(models, "orjson", None)
+    return request.param
+
+
+def test_Serialiser_json_backends(json_backend, tmp_path):
+    synthase = Synthase(
+        header="caf\u00e9",
+        sequence="A" * 10,
+        domains=[
+            Domain(type="KS", start=1, end=5, evalue=1e-05, bitscore=float("nan"))
+        ],
+    )
+    js = synthase.to_json()
+    assert js == json.dumps(synthase.to_dict(), indent=2)
+    assert "1e-05" in js and "\\u00e9" in js and "NaN" in js
+
+    json_file = tmp_path / "synthase.json"
+    with json_file.open("w") as fp:
+        synthase.to_json(fp)
+    with json_file.open() as fp:
+        from_file = Synthase.from_json(fp)
+
+    for result in (Synthase.from_json(js), from_file):
+        assert result.header == "caf\u00e9"
+        assert result.domains[0].evalue == 1e-05
+        assert math.isnan(result.domains[0].bitscore)
@@ -32,6 +32,20 @@ def test_group_overlapping_hits():
     assert groups == [domains[0:3], domains[3:][::-1]]
 
 
+def test_group_overlapping_hits_edge_cases():
+    assert list(results.group_overlapping_hits([])) == []
+
+    # Short hit inside a long one must not shrink the end of the run
+    domains = [
+        Domain(start=0, end=500),
+        Domain(start=20, end=60),
+        Domain(start=300, end=400),
+        Domain(start=600, end=700),
+    ]
+    groups = list(results.group_overlapping_hits(domains))
+    assert groups == [domains[0:3], domains[3:]]
+
+
 def test_parse_row():
     row = "\t\t\t0\t100\t0\t0\tsmart00825\tPKS_KS\t\t"
     domain = results.domain_from_row(row)
@@ -144,6 +158,19 @@ def test_filter_domains():
         assert a.end == b.end
 
 
+def test_filter_domains_fragmented():
+    domains = [
+        Domain(type="KS", domain="PKS_KS", start=1, end=400, evalue=0.0),
+        Domain(type="C", accession="cd19535", start=500, end=690, evalue=0.0),
+        Domain(type="C", accession="cd19535", start=700, end=900, evalue=0.0),
+    ]
+    result = results.filter_domains(domains)
+    assert [(d.type, d.start, d.end) for d in result] == [
+        ("KS", 1, 400),
+        ("C", 500, 900),
+    ]
+
+
 def test_filter_results(test_results):
     assert results.filter_results(test_results) == {
         "one": [